@@ -92,12 +92,18 @@ class PopenWorker:
 
     initargs: Tuple[object]
         A tuple of args for the initializer
+
+    maxtasks: int or None
+        The number of tasks a process completes before it is
+        replaced by a fresh one, or None to keep it for good.
     """
 
-    def __init__(self, initializer=None, initargs=()):
+    def __init__(self, initializer=None, initargs=(), maxtasks=None):
         self._proc = None
         self._initializer = initializer
         self._initargs = initargs
+        self._maxtasks = maxtasks
+        self._num_tasks = 0
         if self._initializer is not None and not callable(self._initializer):
             raise TypeError("initializer must be callable for PopenWorker")
 
@@ -134,6 +140,7 @@ class PopenWorker:
             except OSError:
                 pass
             self._proc = None
+        self._num_tasks = 0
 
     def _start(self):
         """Start a new subprocess if nothing is available"""
@@ -209,16 +216,25 @@ class PopenWorker:
         order to make sure the timeout and child process exit
         won't affect the later requests.
         """
-        # use cloud pickle
-        # pylint: disable=import-outside-toplevel
-        import cloudpickle
-
+        if self._maxtasks is not None and self._num_tasks >= self._maxtasks:
+            # kill and restart the process below,
+            # so that the resources it accumulated are released.
+            self.kill()
         if self._proc is None:
             self._start()
             # init
             if self._initializer is not None:
-                self.send(self._initializer, self._initargs)
+                self._send(self._initializer, self._initargs)
                 self.recv()
+        self._num_tasks += 1
+        self._send(fn, args, kwargs, timeout)
+
+    def _send(self, fn, args=(), kwargs=None, timeout=None):
+        """Write a function task to the subprocess."""
+        # use cloud pickle
+        # pylint: disable=import-outside-toplevel
+        import cloudpickle
+
         kwargs = {} if not kwargs else kwargs
         data = cloudpickle.dumps((fn, args, kwargs, timeout), protocol=pickle.HIGHEST_PROTOCOL)
         try:
@@ -292,6 +308,10 @@ class PopenPoolExecutor:
     initargs: Tuple[object]
         A tuple of args for the initializer
 
+    maxtasksperchild: int or None
+        The number of tasks a worker process completes before it is
+        replaced by a fresh one, or None to keep it for good.
+
     Note
     ----
     If max_workers is NONE then the number returned by
@@ -299,7 +319,14 @@ class PopenPoolExecutor:
     behavior of multiprocessing.pool().
     """
 
-    def __init__(self, max_workers=None, timeout=None, initializer=None, initargs=()):
+    def __init__(
+        self,
+        max_workers=None,
+        timeout=None,
+        initializer=None,
+        initargs=(),
+        maxtasksperchild=None,
+    ):
         if max_workers is None:
             max_workers = os.cpu_count()
         # Use an internal thread pool to send to popen workers
@@ -309,6 +336,7 @@ class PopenPoolExecutor:
         self._lock = threading.Lock()
         self._initializer = initializer
         self._initargs = initargs
+        self._maxtasksperchild = maxtasksperchild
 
         if self._initializer is not None and not callable(self._initializer):
             raise TypeError("initializer must be callable for PopenPoolExecutor")
@@ -328,7 +356,7 @@ class PopenPoolExecutor:
         self._lock.acquire()
         tid = threading.get_ident()
         if tid not in self._worker_map:
-            proc = PopenWorker(self._initializer, self._initargs)
+            proc = PopenWorker(self._initializer, self._initargs, self._maxtasksperchild)
             self._worker_map[tid] = proc
         else:
             proc = self._worker_map[tid]
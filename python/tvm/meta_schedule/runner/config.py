@@ -76,6 +76,9 @@ class RPCConfig(NamedTuple):
         Timeout of the RPC session
     session_priority: int
         Priority of the RPC session
+    idle_session_ttl_sec: float
+        How long an idle RPC session is kept for reuse by the next measurement before it is
+        closed. Set it to 0 to create a new session for every measurement.
     """
 
     tracker_host: Optional[str] = None
@@ -83,6 +86,7 @@ class RPCConfig(NamedTuple):
     tracker_key: Optional[str] = None
     session_priority: int = 1
     session_timeout_sec: int = 10
+    idle_session_ttl_sec: float = 10
 
     def _sanity_check(self) -> None:
         err_str = (
@@ -106,6 +110,7 @@ class RPCConfig(NamedTuple):
             tracker_key=config.tracker_key or os.environ.get("TVM_TRACKER_KEY", None),
             session_priority=config.session_priority,
             session_timeout_sec=config.session_timeout_sec,
+            idle_session_ttl_sec=config.idle_session_ttl_sec,
         )
         config._sanity_check()  # pylint: disable=protected-access
         return config
@@ -169,7 +174,10 @@ class RPCConfig(NamedTuple):
             The number of servers
         """
         tracker = self.connect_tracker()
-        tracker_summary = tracker.summary()
+        try:
+            tracker_summary = tracker.summary()
+        finally:
+            tracker.close()
         result: int = 0
         for item in tracker_summary["server_info"]:
             _, item_key = item["key"].split(":")
@@ -16,14 +16,18 @@
 # under the License.
 """RPC Runner"""
 import concurrent.futures
-from contextlib import contextmanager
 import itertools
+import logging
 import os.path as osp
-from typing import Any, Callable, Dict, List, Optional, Union
+import threading
+import time
+import traceback
+import weakref
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
 
 from tvm.contrib.popen_pool import PopenPoolExecutor
 from tvm.rpc import RPCSession
-from tvm.runtime import Device, Module, ndarray
+from tvm.runtime import Device, Module, PackedFunc, ndarray
 
 from ..utils import (
     get_global_func_on_rpc_session,
@@ -32,6 +36,35 @@ from ..utils import (
 from .config import EvaluatorConfig, RPCConfig
 from .runner import PyRunner, RunnerFuture, RunnerInput, RunnerResult
 
+logger = logging.getLogger(__name__)
+
+
+class _BatchDeadline:
+    """The deadline shared by the futures of a batch measured on a worker thread"""
+
+    timeout_sec: float
+    started_at: Optional[float]
+    waited_at: Optional[float]
+
+    def __init__(self, timeout_sec: float) -> None:
+        self.timeout_sec = timeout_sec
+        self.started_at = None
+        self.waited_at = None
+
+    def start(self) -> None:
+        """Start the clock once a worker picks up the batch"""
+        self.started_at = time.time()
+
+    def remaining_sec(self) -> float:
+        """The time left before the batch times out"""
+        now = time.time()
+        if self.waited_at is None:
+            self.waited_at = now
+        # The clock of a batch still in the queue starts from the first wait instead,
+        # so that the batch times out as well if all the workers are blocked
+        begin = self.started_at if self.started_at is not None else self.waited_at
+        return max(0.0, begin + self.timeout_sec - now)
+
 
 class RPCRunnerFuture(RunnerFuture):
     """RPC based runner future
@@ -42,12 +75,25 @@ class RPCRunnerFuture(RunnerFuture):
         The concurrent function to check when the function is done and to return the result.
     timeout_sec: float
         The timeout in seconds.
+    index: Optional[int]
+        The index of the result in a batch, or None if the future is not batched.
+    deadline: Optional[_BatchDeadline]
+        The deadline shared by the futures of the same batch, or None to wait until the pool
+        resolves the future.
     """
 
     future: concurrent.futures.Future
     timeout_sec: float
+    index: Optional[int]
+    deadline: Optional[_BatchDeadline]
 
-    def __init__(self, future: concurrent.futures.Future, timeout_sec: float) -> None:
+    def __init__(
+        self,
+        future: concurrent.futures.Future,
+        timeout_sec: float,
+        index: Optional[int] = None,
+        deadline: Optional[_BatchDeadline] = None,
+    ) -> None:
         """Constructor
 
         Parameters
@@ -56,28 +102,125 @@ class RPCRunnerFuture(RunnerFuture):
             The concurrent function to check when the function is done and to return the result.
         timeout_sec: float
             The timeout in seconds.
+        index: Optional[int]
+            The index of the result in a batch, or None if the future is not batched.
+            A batched future resolves to a list of `(run_secs, error_msg)` pairs,
+            while a non-batched future resolves to the running time directly.
+        deadline: Optional[_BatchDeadline]
+            The deadline shared by the futures of the same batch, so that they time out together
+            instead of each waiting for the full timeout. None to wait until the pool resolves the
+            future, as PopenPoolExecutor does once it kills a worker on timeout.
         """
         super().__init__()
         self.future = future
         self.timeout_sec = timeout_sec
+        self.index = index
+        self.deadline = deadline
 
     def done(self) -> bool:
         return self.future.done()
 
     def result(self) -> RunnerResult:
         try:
-            run_secs: List[float] = self.future.result()
-        except TimeoutError as exception:
+            value: Any = self.future.result(
+                timeout=None if self.deadline is None else self.deadline.remaining_sec()
+            )
+        except (TimeoutError, concurrent.futures.TimeoutError) as exception:
+            if self.future.done():
+                # PopenPoolExecutor resolves the future with a TimeoutError once it kills the worker
+                return RunnerResult(
+                    None,
+                    error_msg=f"RPCRunner: Timeout, killed after {self.timeout_sec} seconds",
+                )
+            # ThreadPoolExecutor cannot interrupt its workers, so we stop waiting instead
             return RunnerResult(
                 None,
-                error_msg=f"RPCRunner: Timeout, killed after {self.timeout_sec} seconds",
+                error_msg=f"RPCRunner: Timeout, stopped waiting after {self.timeout_sec} seconds, "
+                "while the worker thread may be still blocked",
             )
         except Exception as exception:  # pylint: disable=broad-except
             return RunnerResult(
                 None,
                 error_msg="RPCRunner: An exception occurred\n" + str(exception),
             )
-        return RunnerResult(run_secs, None)
+        if self.index is None:
+            return RunnerResult(value, None)
+        run_secs, error_msg = value[self.index]
+        return RunnerResult(run_secs, error_msg)
+
+
+class _CachedSession(NamedTuple):
+    """An RPC session kept alive by a worker between measurements"""
+
+    session: RPCSession
+    rpc_config: RPCConfig
+    created_at: float
+    expiry_timer: threading.Timer
+
+
+# The states local to each worker, i.e. each thread of the thread pool, or each popen worker
+_WORKER_STATE = threading.local()
+
+# The idle RPC sessions, keyed by the identifier of the worker thread that keeps them
+_IDLE_SESSIONS: Dict[int, _CachedSession] = {}
+_IDLE_SESSIONS_LOCK = threading.Lock()
+
+
+def _acquire_session(rpc_config: RPCConfig) -> Optional[_CachedSession]:
+    """Take the session cached by the current worker, or None if there is no usable one.
+    The session is handed back to the cache by `_release_session` only if the measurement
+    succeeds, so that a session broken by an exception is never reused.
+    """
+    with _IDLE_SESSIONS_LOCK:
+        cached = _IDLE_SESSIONS.pop(threading.get_ident(), None)
+    if cached is None:
+        return None
+    cached.expiry_timer.cancel()
+    if cached.rpc_config != rpc_config:
+        return None
+    return cached
+
+
+def _release_session(session: RPCSession, rpc_config: RPCConfig, created_at: float) -> None:
+    """Hand the session back to the cache of the current worker for later reuse.
+    The session is closed once it stays idle for `idle_session_ttl_sec`, or once half of
+    `session_timeout_sec` has elapsed since its creation, since the server closes a session
+    when that timeout expires.
+    """
+    ttl_sec = min(
+        rpc_config.idle_session_ttl_sec,
+        created_at + rpc_config.session_timeout_sec / 2 - time.time(),
+    )
+    if ttl_sec <= 0:
+        return
+    worker = threading.get_ident()
+    expiry_timer = threading.Timer(ttl_sec, _expire_session, args=(worker,))
+    expiry_timer.daemon = True
+    with _IDLE_SESSIONS_LOCK:
+        _IDLE_SESSIONS[worker] = _CachedSession(session, rpc_config, created_at, expiry_timer)
+    expiry_timer.start()
+
+
+def _is_session_alive(session: RPCSession) -> bool:
+    """Check if the session still reaches the server, with a single round trip"""
+    try:
+        session.get_function("tvm.rpc.server.remove")
+    except AttributeError:
+        # The server answered, even though it does not have the function
+        return True
+    except Exception:  # pylint: disable=broad-except
+        return False
+    return True
+
+
+def _expire_session(worker: int) -> None:
+    """Close the session kept by the worker, unless the worker has taken it back since then"""
+    with _IDLE_SESSIONS_LOCK:
+        cached = _IDLE_SESSIONS.get(worker, None)
+        if cached is None or cached.expiry_timer is not threading.current_thread():
+            return
+        del _IDLE_SESSIONS[worker]
+    # Dropping the last reference to the session closes it
 
 
 T_ARG_INFO_JSON_OBJ = List[Any]  # pylint: disable=invalid-name
@@ -109,8 +252,8 @@ class RPCRunner(PyRunner):
         The function name to run the evaluator or the function itself.
     f_cleanup: Optional[str, Callable]
         The function name to cleanup the session or the function itself.
-    pool: PopenPoolExecutor
-        The popen pool executor.
+    pool: Union[concurrent.futures.ThreadPoolExecutor, PopenPoolExecutor]
+        The pool executor that dispatches the RPC sessions.
 
     Attributes
     ----------
@@ -223,7 +366,14 @@ class RPCRunner(PyRunner):
     f_run_evaluator: Union[T_RUN_EVALUATOR, str, None]
     f_cleanup: Union[T_CLEANUP, str, None]
 
-    pool: PopenPoolExecutor
+    pool: Union[concurrent.futures.ThreadPoolExecutor, PopenPoolExecutor]
+
+    # The number of workers detected for each tracker and key that has some servers
+    _DETECTED_MAX_WORKERS: Dict[tuple, int] = {}
+
+    # The setups of runners that already passed the sanity check. The functions are held by weak
+    # references, and a setup is dropped once any of its functions is garbage collected.
+    _SANITY_CACHE: Set[tuple] = set()
 
     def __init__(
         self,
@@ -236,8 +386,10 @@ class RPCRunner(PyRunner):
         f_alloc_argument: Union[T_ALLOC_ARGUMENT, str, None] = None,
         f_run_evaluator: Union[T_RUN_EVALUATOR, str, None] = None,
         f_cleanup: Union[T_CLEANUP, str, None] = None,
-        max_workers: int = 1,
+        max_workers: Union[int, str] = "auto",
         initializer: Optional[Callable[[], None]] = None,
+        pool_type: str = "thread",
+        batch_size: int = 1,
     ) -> None:
         """Constructor
 
@@ -261,12 +413,37 @@ class RPCRunner(PyRunner):
             The function name to run the evaluator or the function itself.
         f_cleanup: Union[T_CLEANUP, str, None]
             The function name to cleanup the session or the function itself.
-        max_workers: int = 1
-            The maximum number of connections. Defaults to 1.
+        max_workers: Union[int, str] = "auto"
+            The maximum number of connections. If "auto", it is the number of servers registered
+            to the tracker under the key, capped at 16, or 1 if the tracker cannot be queried.
+            The tracker is queried by each runner until it reports some servers under the key,
+            after which the count is kept for the later runners of the same tracker and key.
         initializer: Optional[Callable[[], None]]
-            The initializer function.
+            The initializer function. It runs in each worker process if pool_type is "process",
+            or once in the current process if pool_type is "thread".
+        pool_type: str = "thread"
+            The kind of pool to dispatch the RPC sessions, either "thread" or "process".
+            A thread pool avoids the memory and pickling overhead of worker processes, as the
+            RPC workers mostly block on network I/O. However, a thread cannot be killed: a worker
+            thread blocked on a hung session stays blocked for good, and the inputs queued behind
+            it time out as well once all the workers are blocked. Use "process" if the sessions
+            may hang, or if the functions are not thread-safe.
+        batch_size: int = 1
+            The maximum number of runner inputs measured by a worker process in a single task,
+            which amortizes the pickling and dispatch of the tasks. It only applies if pool_type
+            is "process", while a worker thread always measures one input per task, so that a
+            hung input never holds up the others. Note that the pool timeout is scaled by
+            batch_size, and a batch that times out is killed as a whole, so a single hung input
+            costs up to `session_timeout_sec * batch_size`, and the inputs already measured in
+            the batch are reported as timed out as well.
         """
         super().__init__()
+        if pool_type not in ("process", "thread"):
+            raise ValueError(f'Unknown pool_type: "{pool_type}". Expected "process" or "thread"')
+        if isinstance(max_workers, str) and max_workers != "auto":
+            raise ValueError(f'Unknown max_workers: "{max_workers}". Expected an int or "auto"')
+        if batch_size < 1:
+            raise ValueError(f"Invalid batch_size: {batch_size}. Expected a positive int")
         self.rpc_config = RPCConfig._normalized(rpc_config)
         self.evaluator_config = EvaluatorConfig._normalized(evaluator_config)
         self.cooldown_sec = cooldown_sec
@@ -276,36 +453,199 @@ class RPCRunner(PyRunner):
         self.f_alloc_argument = f_alloc_argument
         self.f_run_evaluator = f_run_evaluator
         self.f_cleanup = f_cleanup
-        self.pool = PopenPoolExecutor(
-            max_workers=max_workers,
-            timeout=rpc_config.session_timeout_sec,
-            initializer=initializer,
+        if max_workers == "auto":
+            max_workers = RPCRunner._detect_max_workers(self.rpc_config)
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        # Each worker resolves the functions and keeps the configurations once, right after
+        # running the user's initializer, so that the tasks only carry the runner inputs
+        worker_initializer = initializer
+        if pool_type == "thread" and initializer is not None:
+            # The worker threads share the current process, so the initializer only runs once
+            initializer()
+            worker_initializer = None
+        initargs = (
+            worker_initializer,
+            self.f_create_session,
+            self.f_upload_module,
+            self.f_alloc_argument,
+            self.f_run_evaluator,
+            self.f_cleanup,
+            self.rpc_config,
+            self.evaluator_config,
+            self.alloc_repeat,
+        )
+        if pool_type == "thread":
+            self.pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers,
+                initializer=RPCRunner._init_worker,
+                initargs=initargs,
+            )
+        else:
+            self.pool = PopenPoolExecutor(
+                max_workers=max_workers,
+                timeout=self.rpc_config.session_timeout_sec * batch_size,
+                initializer=RPCRunner._init_worker,
+                initargs=initargs,
+                # Recycle the workers periodically to bound the memory they accumulate
+                # over a long tuning session, which also drops their cached RPC sessions
+                maxtasksperchild=max(64, 4 * alloc_repeat),
+            )
+        # The outcome of the sanity check only depends on the kind of pool, the initializer and
+        # the functions, so it is done once for all the runners set up the same way
+        sanity_key = RPCRunner._sanity_key(
+            pool_type,
+            initializer,
+            self.f_create_session,
+            self.f_upload_module,
+            self.f_alloc_argument,
+            self.f_run_evaluator,
+            self.f_cleanup,
         )
-        self._sanity_check()
+        if sanity_key is None or sanity_key not in RPCRunner._SANITY_CACHE:
+            self._sanity_check()
+            if sanity_key is not None:
+                RPCRunner._SANITY_CACHE.add(sanity_key)
 
     def run(self, runner_inputs: List[RunnerInput]) -> List[RunnerFuture]:
         results: List[RunnerFuture] = []
-        for runner_input in runner_inputs:
-            future = RPCRunnerFuture(
-                future=self.pool.submit(
-                    RPCRunner._worker_func,
-                    self.f_create_session,
-                    self.f_upload_module,
-                    self.f_alloc_argument,
-                    self.f_run_evaluator,
-                    self.f_cleanup,
-                    self.rpc_config,
-                    self.evaluator_config,
-                    self.alloc_repeat,
-                    str(runner_input.artifact_path),
-                    str(runner_input.device_type),
-                    tuple(arg_info.as_json() for arg_info in runner_input.args_info),
-                ),
-                timeout_sec=self.rpc_config.session_timeout_sec,
+        num_inputs = len(runner_inputs)
+        # Convert the inputs to plain python objects once, outside the submission loop
+        worker_inputs: List[Tuple[str, str, T_ARG_INFO_JSON_OBJ_LIST]] = [
+            (
+                str(runner_input.artifact_path),
+                str(runner_input.device_type),
+                tuple(arg_info.as_json() for arg_info in runner_input.args_info),
             )
-            results.append(future)
+            for runner_input in runner_inputs
+        ]
+        if not isinstance(self.pool, PopenPoolExecutor):
+            # Each input has its own deadline, as a worker thread blocked on a hung input
+            # cannot be killed, and would otherwise hold up the inputs batched after it
+            timeout_sec = self.rpc_config.session_timeout_sec
+            for worker_input in worker_inputs:
+                deadline = _BatchDeadline(timeout_sec)
+                future = self.pool.submit(RPCRunner._worker_func_batch, [worker_input], deadline)
+                results.append(RPCRunnerFuture(future, timeout_sec, 0, deadline))
+            return results
+        # The popen pool kills the workers on its own timeout, which is scaled by batch_size
+        timeout_sec = self.rpc_config.session_timeout_sec * self.batch_size
+        # Shrink the batches when there are too few inputs to keep all the workers busy
+        batch_size = max(1, min(self.batch_size, -(-num_inputs // self.max_workers)))
+        for batch_begin in range(0, num_inputs, batch_size):
+            batch = worker_inputs[batch_begin : batch_begin + batch_size]
+            future = self.pool.submit(RPCRunner._worker_func_batch, batch)
+            for index in range(len(batch)):
+                results.append(RPCRunnerFuture(future, timeout_sec, index))
         return results
 
+    @staticmethod
+    def _detect_max_workers(rpc_config: RPCConfig, max_workers_cap: int = 16) -> int:
+        tracker = (rpc_config.tracker_host, rpc_config.tracker_port, rpc_config.tracker_key)
+        max_workers = RPCRunner._DETECTED_MAX_WORKERS.get(tracker, None)
+        if max_workers is not None:
+            return max_workers
+        try:
+            num_servers = rpc_config.count_num_servers(allow_missing=True)
+        except Exception as exception:  # pylint: disable=broad-except
+            logger.warning(
+                "RPCRunner: Unable to count the servers in the tracker, using 1 worker: %s",
+                exception,
+            )
+            return 1
+        if num_servers == 0:
+            logger.warning(
+                "RPCRunner: No server with key %s in the tracker yet, using 1 worker",
+                rpc_config.tracker_key,
+            )
+            return 1
+        max_workers = min(num_servers, max_workers_cap)
+        logger.info(
+            "RPCRunner: Using %d workers for %d servers with key %s",
+            max_workers,
+            num_servers,
+            rpc_config.tracker_key,
+        )
+        # Only a successful count is kept, so that the tracker is queried again by later runners
+        # until the servers are registered
+        RPCRunner._DETECTED_MAX_WORKERS[tracker] = max_workers
+        return max_workers
+
+    @staticmethod
+    def as_completed_results(
+        futures: List[RPCRunnerFuture],
+        timeout_sec: Optional[float] = None,
+    ) -> Iterator[Tuple[int, RunnerResult]]:
+        """Yield the results of the futures returned by `run` in the order they complete.
+        It is preferred over calling `result` on each future in turn, which blocks on the slowest
+        of the earlier futures even if the later ones are already done.
+
+        Parameters
+        ----------
+        futures: List[RPCRunnerFuture]
+            The futures returned by `run`.
+        timeout_sec: Optional[float]
+            The timeout in seconds for all the futures to complete. If None, each future times out
+            on its own deadline, the same as it does in `result`.
+
+        Returns
+        -------
+        results: Iterator[Tuple[int, RunnerResult]]
+            The index of each future in `futures` and its result.
+        """
+        # Futures in the same batch share the same underlying future and the same deadline
+        pending: Dict[concurrent.futures.Future, List[int]] = {}
+        for index, future in enumerate(futures):
+            pending.setdefault(future.future, []).append(index)
+        end_time = None if timeout_sec is None else time.time() + timeout_sec
+        while pending:
+            # Wait until any future completes, or until the earliest deadline passes
+            wait_secs = [
+                deadline.remaining_sec()
+                for deadline in (futures[indices[0]].deadline for indices in pending.values())
+                if deadline is not None
+            ]
+            if end_time is not None:
+                wait_secs.append(max(0.0, end_time - time.time()))
+            done, _ = concurrent.futures.wait(
+                pending,
+                timeout=min(wait_secs, default=None),
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            if not done and end_time is not None and time.time() >= end_time:
+                break
+            for future, indices in list(pending.items()):
+                deadline = futures[indices[0]].deadline
+                if future in done or (deadline is not None and deadline.remaining_sec() == 0):
+                    del pending[future]
+                    for index in indices:
+                        yield index, futures[index].result()
+        for indices in pending.values():
+            for index in indices:
+                yield index, RunnerResult(
+                    None,
+                    error_msg=f"RPCRunner: Timeout, not completed after {timeout_sec} seconds",
+                )
+
+    @staticmethod
+    def _sanity_key(*setup: Any) -> Optional[tuple]:
+        """The key of a runner setup in the sanity check cache,
+        or None if the setup cannot be cached, e.g. when a function is not hashable
+        """
+
+        def _on_collected(ref: weakref.ref) -> None:
+            RPCRunner._SANITY_CACHE = {key for key in RPCRunner._SANITY_CACHE if ref not in key}
+
+        try:
+            key = tuple(
+                item if item is None or isinstance(item, str) else weakref.ref(item, _on_collected)
+                for item in setup
+            )
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
     def _sanity_check(self) -> None:
         def _check(
             f_create_session,
@@ -331,7 +671,8 @@ class RPCRunner(PyRunner):
         value.result()
 
     @staticmethod
-    def _worker_func(
+    def _init_worker(
+        initializer: Optional[Callable[[], None]],
         _f_create_session: Union[T_CREATE_SESSION, str, None],
         _f_upload_module: Union[T_UPLOAD_MODULE, str, None],
         _f_alloc_argument: Union[T_ALLOC_ARGUMENT, str, None],
@@ -340,41 +681,111 @@ class RPCRunner(PyRunner):
         rpc_config: RPCConfig,
         evaluator_config: EvaluatorConfig,
         alloc_repeat: int,
+    ) -> None:
+        if initializer is not None:
+            initializer()
+        _WORKER_STATE.rpc_config = rpc_config
+        _WORKER_STATE.evaluator_config = evaluator_config
+        _WORKER_STATE.alloc_repeat = alloc_repeat
+        _WORKER_STATE.func_names = (
+            _f_create_session,
+            _f_upload_module,
+            _f_alloc_argument,
+            _f_run_evaluator,
+            _f_cleanup,
+        )
+        try:
+            _WORKER_STATE.funcs = RPCRunner._resolve_worker_funcs(*_WORKER_STATE.func_names)
+        except ValueError:
+            # Leave the error to the tasks, which report it instead of breaking the pool
+            _WORKER_STATE.funcs = None
+
+    @staticmethod
+    def _resolve_worker_funcs(
+        _f_create_session: Union[T_CREATE_SESSION, str, None],
+        _f_upload_module: Union[T_UPLOAD_MODULE, str, None],
+        _f_alloc_argument: Union[T_ALLOC_ARGUMENT, str, None],
+        _f_run_evaluator: Union[T_RUN_EVALUATOR, str, None],
+        _f_cleanup: Union[T_CLEANUP, str, None],
+    ) -> Tuple[T_CREATE_SESSION, T_UPLOAD_MODULE, T_ALLOC_ARGUMENT, T_RUN_EVALUATOR, T_CLEANUP]:
+        return (
+            get_global_func_with_default_on_worker(_f_create_session, default_create_session),
+            get_global_func_with_default_on_worker(_f_upload_module, default_upload_module),
+            get_global_func_with_default_on_worker(_f_alloc_argument, default_alloc_argument),
+            get_global_func_with_default_on_worker(_f_run_evaluator, default_run_evaluator),
+            get_global_func_with_default_on_worker(_f_cleanup, default_cleanup),
+        )
+
+    @staticmethod
+    def _worker_func_batch(
+        batch_args: List[Tuple[str, str, T_ARG_INFO_JSON_OBJ_LIST]],
+        deadline: Optional[_BatchDeadline] = None,
+    ) -> List[Tuple[Optional[List[float]], Optional[str]]]:
+        if deadline is not None:
+            deadline.start()
+        results: List[Tuple[Optional[List[float]], Optional[str]]] = []
+        for artifact_path, device_type, args_info in batch_args:
+            # The session cached by the worker is shared by all the inputs in the batch,
+            # and it is recreated only if a measurement fails
+            try:
+                costs = RPCRunner._worker_func(artifact_path, device_type, args_info)
+            except Exception:  # pylint: disable=broad-except
+                results.append(
+                    (None, "RPCRunner: An exception occurred\n" + traceback.format_exc())
+                )
+            else:
+                results.append((costs, None))
+        return results
+
+    @staticmethod
+    def _worker_func(
         artifact_path: str,
         device_type: str,
         args_info: T_ARG_INFO_JSON_OBJ_LIST,
     ) -> List[float]:
-        # Step 0. Get the registered functions
-        f_create_session: RPCRunner.T_CREATE_SESSION = get_global_func_with_default_on_worker(
-            _f_create_session, default_create_session
-        )
-        f_upload_module: RPCRunner.T_UPLOAD_MODULE = get_global_func_with_default_on_worker(
-            _f_upload_module, default_upload_module
-        )
-        f_alloc_argument: RPCRunner.T_ALLOC_ARGUMENT = get_global_func_with_default_on_worker(
-            _f_alloc_argument, default_alloc_argument
-        )
-        f_run_evaluator: RPCRunner.T_RUN_EVALUATOR = get_global_func_with_default_on_worker(
-            _f_run_evaluator, default_run_evaluator
-        )
-        f_cleanup: RPCRunner.T_CLEANUP = get_global_func_with_default_on_worker(
-            _f_cleanup, default_cleanup
-        )
+        cached = _acquire_session(_WORKER_STATE.rpc_config)
+        if cached is not None:
+            try:
+                return RPCRunner._measure(
+                    cached.session,
+                    cached.created_at,
+                    artifact_path,
+                    device_type,
+                    args_info,
+                )
+            except Exception:  # pylint: disable=broad-except
+                # The reused session may be closed by the server in the meantime, in which case
+                # the measurement is retried once on a new session. Any other failure is the
+                # candidate's own, and retrying it would only double its cost.
+                if _is_session_alive(cached.session):
+                    raise
+                logger.debug("RPCRunner: Retry on a new session", exc_info=True)
+        return RPCRunner._measure(None, None, artifact_path, device_type, args_info)
+
+    @staticmethod
+    def _measure(
+        session: Optional[RPCSession],
+        created_at: Optional[float],
+        artifact_path: str,
+        device_type: str,
+        args_info: T_ARG_INFO_JSON_OBJ_LIST,
+    ) -> List[float]:
+        # Step 0. Get the functions and the configurations kept when the worker is initialized
+        rpc_config: RPCConfig = _WORKER_STATE.rpc_config
+        evaluator_config: EvaluatorConfig = _WORKER_STATE.evaluator_config
+        alloc_repeat: int = _WORKER_STATE.alloc_repeat
+        funcs = _WORKER_STATE.funcs
+        if funcs is None:
+            # Raise the error of resolving the functions
+            funcs = RPCRunner._resolve_worker_funcs(*_WORKER_STATE.func_names)
+        f_create_session, f_upload_module, f_alloc_argument, f_run_evaluator, f_cleanup = funcs
         # Managed resources
-        session: Optional[RPCSession] = None
         remote_path: Optional[str] = None
-
-        @contextmanager
-        def resource_handler():
-            try:
-                yield
-            finally:
-                # Step 5. Clean up
-                f_cleanup(session, remote_path)
-
-        with resource_handler():
-            # Step 1. Create session
-            session = f_create_session(rpc_config)
+        try:
+            # Step 1. Create session, unless the one cached by the worker is reused
+            if session is None:
+                created_at = time.time()
+                session = f_create_session(rpc_config)
             device = session.device(dev_type=device_type, dev_id=0)
             # Step 2. Upload the module
             _, remote_path = osp.split(artifact_path)
@@ -395,6 +806,10 @@ class RPCRunner(PyRunner):
                 evaluator_config,
                 repeated_args,
             )
+        finally:
+            # Step 5. Clean up
+            f_cleanup(session, remote_path)
+        _release_session(session, rpc_config, created_at)
         return costs
 
 
@@ -464,34 +879,36 @@ def default_alloc_argument(
     repeated_args: List[Args]
         The allocation args
     """
-    f_random_fill = get_global_func_on_rpc_session(
-        session,
-        "tvm.contrib.random.random_fill",
-        "Please make sure 'USE_RANDOM' is turned ON in the config.cmake on the RPC server.",
-    )
-
-    def alloc_tensor(_, dtype, shape) -> ndarray.NDArray:
-        arg = ndarray.empty(shape=shape, dtype=dtype, device=device)
-        f_random_fill(arg)
-        return arg
-
-    def alloc_fail(*arg_info) -> None:
-        raise NotImplementedError(arg_info)
-
-    dispatcher: Dict[Any, Callable] = {
-        "TENSOR": alloc_tensor,
-        None: alloc_fail,
-    }
+    try:
+        # Fill all the arguments in a single round trip if the server supports it
+        f_random_fill_batch: Optional[PackedFunc] = session.get_function(
+            "tvm.contrib.random.random_fill_batch"
+        )
+        f_random_fill: Optional[PackedFunc] = None
+    except AttributeError:
+        f_random_fill_batch = None
+        f_random_fill = get_global_func_on_rpc_session(
+            session,
+            "tvm.contrib.random.random_fill",
+            "Please make sure 'USE_RANDOM' is turned ON in the config.cmake on the RPC server.",
+        )
 
-    repeated_args: List[T_ARGUMENT_LIST] = []
-    for _ in range(alloc_repeat):
-        args: T_ARGUMENT_LIST = []
+    num_args = len(args_info)
+    repeated_args: List[T_ARGUMENT_LIST] = [None] * alloc_repeat  # type: ignore
+    for repeat in range(alloc_repeat):
+        args: T_ARGUMENT_LIST = [None] * num_args
         arg_info: T_ARG_INFO_JSON_OBJ
-        for arg_info in args_info:
-            arg_type = arg_info[0]
-            arg: Any = dispatcher.get(arg_type, None)(*arg_info)
-            args.append(arg)
-        repeated_args.append(args)
+        for i, arg_info in enumerate(args_info):
+            if arg_info[0] != "TENSOR":
+                raise NotImplementedError(arg_info)
+            _, dtype, shape = arg_info
+            arg = ndarray.empty(shape, dtype, device)
+            if f_random_fill is not None:
+                f_random_fill(arg)
+            args[i] = arg
+        repeated_args[repeat] = args
+    if f_random_fill_batch is not None:
+        f_random_fill_batch(*itertools.chain.from_iterable(repeated_args))
     return repeated_args
 
 
@@ -533,14 +950,24 @@ def default_run_evaluator(
         else "",
     )
     repeated_costs: List[List[float]] = []
+    # Synchronize once before the measurements. Each call of the evaluator synchronizes the
+    # device by itself after its warm-up run, so the later ones start on an idle device.
+    device.sync()
     for args in repeated_args:
-        device.sync()
         profile_result = evaluator(*args)
         repeated_costs.append(profile_result.results)
-    costs = [float(cost) for cost in itertools.chain.from_iterable(repeated_costs)]
+    # The results of `time_evaluator` are already python floats unpacked from the returned blob
+    costs = list(itertools.chain.from_iterable(repeated_costs))
     return costs
 
 
+# The function to remove files in one round trip on each RPC session,
+# or None if the server does not provide it
+_REMOTE_REMOVE_FILES: "weakref.WeakKeyDictionary[RPCSession, Optional[PackedFunc]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
 def default_cleanup(
     session: Optional[RPCSession],
     remote_path: Optional[str],
@@ -555,6 +982,15 @@ def default_cleanup(
         The remote path to clean up
     """
     if session is not None and remote_path is not None:
-        session.remove(remote_path)
-        session.remove(remote_path + ".so")
-        session.remove("")
+        if session not in _REMOTE_REMOVE_FILES:
+            try:
+                _REMOTE_REMOVE_FILES[session] = session.get_function("tvm.rpc.server.remove_files")
+            except AttributeError:
+                # The server is built before `tvm.rpc.server.remove_files` is introduced
+                _REMOTE_REMOVE_FILES[session] = None
+        f_remove_files: Optional[PackedFunc] = _REMOTE_REMOVE_FILES[session]
+        if f_remove_files is not None:
+            f_remove_files(remote_path, remote_path + ".so")
+        else:
+            session.remove(remote_path)
+            session.remove(remote_path + ".so")
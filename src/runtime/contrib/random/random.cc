@@ -123,5 +123,14 @@ TVM_REGISTER_GLOBAL("tvm.contrib.random.random_fill").set_body([](TVMArgs args,
   entry->random_engine.RandomFill(out);
 });
 
+TVM_REGISTER_GLOBAL("tvm.contrib.random.random_fill_batch")
+    .set_body([](TVMArgs args, TVMRetValue* ret) {
+      RandomThreadLocalEntry* entry = RandomThreadLocalEntry::ThreadLocal();
+      for (int i = 0; i < args.size(); ++i) {
+        DLTensor* out = args[i];
+        entry->random_engine.RandomFill(out);
+      }
+    });
+
 }  // namespace contrib
 }  // namespace tvm
@@ -57,5 +57,12 @@ TVM_REGISTER_GLOBAL("tvm.rpc.server.remove").set_body([](TVMArgs args, TVMRetVal
   RemoveFile(file_name);
 });
 
+TVM_REGISTER_GLOBAL("tvm.rpc.server.remove_files").set_body([](TVMArgs args, TVMRetValue* rv) {
+  for (int i = 0; i < args.size(); ++i) {
+    std::string file_name = RPCGetPath(args[i]);
+    RemoveFile(file_name);
+  }
+});
+
 }  // namespace runtime
 }  // namespace tvm
@@ -15,6 +15,7 @@
 # specific language governing permissions and limitations
 # under the License.
 """Test PopenPoolExecutor."""
+import os
 import pytest
 import time
 from tvm.contrib.popen_pool import PopenWorker, PopenPoolExecutor
@@ -51,6 +52,34 @@ def test_popen_worker():
     assert proc.recv() == 4
 
 
+def test_popen_worker_maxtasks():
+    proc = PopenWorker(maxtasks=2)
+
+    proc.send(os.getpid)
+    pid1 = proc.recv()
+    proc.send(os.getpid)
+    pid2 = proc.recv()
+    proc.send(os.getpid)
+    pid3 = proc.recv()
+    assert pid1 == pid2
+    assert pid2 != pid3
+
+
+def test_popen_worker_maxtasks_initializer():
+    initargs = [1, 2, 3]
+    proc = PopenWorker(initializer=initializer, initargs=initargs, maxtasks=1)
+
+    # the initializer does not count as a task, and runs again in each new process
+    for _ in range(2):
+        proc.send(after_initializer)
+        assert proc.recv() == tuple(initargs)
+    proc.send(os.getpid)
+    pid1 = proc.recv()
+    proc.send(os.getpid)
+    pid2 = proc.recv()
+    assert pid1 != pid2
+
+
 def test_popen_pool_executor():
     import tvm
 
@@ -140,6 +169,8 @@ def test_popen_pool_executor_timeout():
 
 if __name__ == "__main__":
     test_popen_worker()
+    test_popen_worker_maxtasks()
+    test_popen_worker_maxtasks_initializer()
     test_popen_pool_executor()
     test_popen_initializer()
     test_popen_ffi()
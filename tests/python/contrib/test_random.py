@@ -133,6 +133,12 @@ def test_random_fill():
             np_values = value.numpy()
             assert np.isfinite(np_values * np_values + np_values).any()
 
+            values = [tvm.nd.empty((512, 512), dtype, remote.cpu()) for _ in range(2)]
+            random_fill_batch = remote.get_function("tvm.contrib.random.random_fill_batch")
+            random_fill_batch(*values)
+            for value in values:
+                assert np.count_nonzero(value.numpy()) == 512 * 512
+
         check_remote(rpc.Server("127.0.0.1"))
 
     for dtype in [
@@ -16,6 +16,7 @@
 # under the License.
 """ Test Meta Schedule Runner """
 
+import concurrent.futures
 import itertools
 import sys
 import time
@@ -36,9 +37,16 @@ from tvm.meta_schedule.runner import (
     RunnerFuture,
     RunnerInput,
 )
+from tvm.meta_schedule.runner.rpc_runner import (
+    RPCRunnerFuture,
+    _BatchDeadline,
+)
 from tvm.meta_schedule.runner.rpc_runner import (
     default_alloc_argument as rpc_default_alloc_argument,
 )
+from tvm.meta_schedule.runner.rpc_runner import (
+    default_run_evaluator as rpc_default_run_evaluator,
+)
 from tvm.meta_schedule.testing import LocalRPC
 from tvm.meta_schedule.utils import get_global_func_with_default_on_worker
 from tvm.rpc import RPCSession
@@ -122,7 +130,8 @@ def _clean_build(artifact_path: str) -> None:
         raise RuntimeError("Unable to find remove_build_dir function.")
 
 
-def test_meta_schedule_rpc_single_run():
+@pytest.mark.parametrize("pool_type", ["thread", "process"])
+def test_meta_schedule_rpc_single_run(pool_type: str):
     """Test meta schedule rpc runner for a single run"""
     # Build the module
     mod = MatmulModule
@@ -155,7 +164,8 @@ def test_meta_schedule_rpc_single_run():
             min_repeat_ms=0,
             enable_cpu_cache_flush=False,
         )
-        runner = RPCRunner(rpc_config, evaluator_config)
+        runner = RPCRunner(rpc_config, evaluator_config, pool_type=pool_type)
+        assert runner.max_workers == 1
         # Run the module
         (runner_future,) = runner.run([runner_input])
         runner_result = runner_future.result()
@@ -168,7 +178,8 @@ def test_meta_schedule_rpc_single_run():
     _clean_build(builder_result.artifact_path)
 
 
-def test_meta_schedule_rpc_multiple_runs():
+@pytest.mark.parametrize("batch_size", [1, 8])
+def test_meta_schedule_rpc_multiple_runs(batch_size: int):
     """Test meta schedule rpc runner for multiple runs"""
     # Build the module
     mods = [
@@ -220,10 +231,20 @@ def test_meta_schedule_rpc_multiple_runs():
             min_repeat_ms=0,
             enable_cpu_cache_flush=False,
         )
-        runner = RPCRunner(rpc_config, evaluator_config)
+        # Batching only applies to the worker processes
+        runner = RPCRunner(
+            rpc_config,
+            evaluator_config,
+            pool_type="process",
+            batch_size=batch_size,
+        )
         # Run the module
         runner_futures = runner.run(runner_inputs)
         runner_results = [runner_future.result() for runner_future in runner_futures]
+        completed = dict(RPCRunner.as_completed_results(runner_futures))
+    assert sorted(completed.keys()) == list(range(len(mods)))
+    for runner_result in completed.values():
+        assert runner_result.error_msg is None
 
     for runner_result in runner_results:
         assert runner_result.error_msg is None
@@ -237,6 +258,199 @@ def test_meta_schedule_rpc_multiple_runs():
         _clean_build(builder_result.artifact_path)
 
 
+def test_meta_schedule_rpc_runner_session_reuse():
+    """Test meta schedule rpc runner reuses the RPC session across runs"""
+    # Build the module
+    mod = MatmulModule
+    builder = LocalBuilder()
+    (builder_result,) = builder.build([BuilderInput(mod, Target("llvm"))])
+    assert builder_result.artifact_path is not None
+    assert builder_result.error_msg is None
+
+    runner_input = RunnerInput(
+        builder_result.artifact_path,
+        "llvm",
+        [
+            TensorInfo("float32", (MATMUL_N, MATMUL_N)),
+            TensorInfo("float32", (MATMUL_N, MATMUL_N)),
+            TensorInfo("float32", (MATMUL_N, MATMUL_N)),
+        ],
+    )
+    num_sessions = 0
+
+    def test_create_session(rpc_config: RPCConfig) -> RPCSession:
+        nonlocal num_sessions
+        num_sessions += 1
+        return rpc_config.connect_server()
+
+    with LocalRPC() as rpc:
+        rpc_config = RPCConfig(
+            tracker_host=rpc.tracker_host,
+            tracker_port=rpc.tracker_port,
+            tracker_key=rpc.tracker_key,
+            session_priority=1,
+            session_timeout_sec=100,
+            idle_session_ttl_sec=1,
+        )
+        evaluator_config = EvaluatorConfig(
+            number=1,
+            repeat=1,
+            min_repeat_ms=0,
+            enable_cpu_cache_flush=False,
+        )
+        # The sessions are counted in the current process, so the workers have to be threads
+        runner = RPCRunner(
+            rpc_config,
+            evaluator_config,
+            f_create_session=test_create_session,
+            pool_type="thread",
+        )
+        # Run the module twice
+        runner_results = [
+            runner_future.result()
+            for _ in range(2)
+            for runner_future in runner.run([runner_input])
+        ]
+        assert num_sessions == 1
+        # Run the module again once the idle session expires
+        time.sleep(2)
+        runner_results += [runner_future.result() for runner_future in runner.run([runner_input])]
+        assert num_sessions == 2
+    for runner_result in runner_results:
+        assert runner_result.error_msg is None
+    _clean_build(builder_result.artifact_path)
+
+
+def test_meta_schedule_rpc_runner_session_retry():
+    """Test meta schedule rpc runner retries on a new session only if the reused one is closed"""
+    # Build the module
+    mod = MatmulModule
+    builder = LocalBuilder()
+    (builder_result,) = builder.build([BuilderInput(mod, Target("llvm"))])
+    assert builder_result.artifact_path is not None
+    assert builder_result.error_msg is None
+
+    runner_input = RunnerInput(
+        builder_result.artifact_path,
+        "llvm",
+        [
+            TensorInfo("float32", (MATMUL_N, MATMUL_N)),
+            TensorInfo("float32", (MATMUL_N, MATMUL_N)),
+            TensorInfo("float32", (MATMUL_N, MATMUL_N)),
+        ],
+    )
+    num_sessions = 0
+    num_evaluations = 0
+
+    class ClosableSession(RPCSession):
+        """A session that stops reaching the server once closed"""
+
+        closed = False
+
+        def get_function(self, name):
+            if self.closed:
+                raise tvm.TVMError("Session closed")
+            return super().get_function(name)
+
+    def test_create_session(rpc_config: RPCConfig) -> RPCSession:
+        nonlocal num_sessions
+        num_sessions += 1
+        return ClosableSession(rpc_config.connect_server()._sess)
+
+    def test_run_evaluator(session: ClosableSession, *args) -> List[float]:
+        nonlocal num_evaluations
+        num_evaluations += 1
+        if num_evaluations == 2:
+            # Close the reused session during the measurement, which is then retried
+            session.closed = True
+            raise RuntimeError("Session closed")
+        if num_evaluations == 4:
+            # Fail the measurement on a reused session that is still alive, which is not retried
+            raise RuntimeError("Candidate failed")
+        return rpc_default_run_evaluator(session, *args)
+
+    with LocalRPC() as rpc:
+        rpc_config = RPCConfig(
+            tracker_host=rpc.tracker_host,
+            tracker_port=rpc.tracker_port,
+            tracker_key=rpc.tracker_key,
+            session_priority=1,
+            session_timeout_sec=100,
+        )
+        evaluator_config = EvaluatorConfig(
+            number=1,
+            repeat=1,
+            min_repeat_ms=0,
+            enable_cpu_cache_flush=False,
+        )
+        # The calls are counted in the current process, so the workers have to be threads
+        runner = RPCRunner(
+            rpc_config,
+            evaluator_config,
+            f_create_session=test_create_session,
+            f_run_evaluator=test_run_evaluator,
+            pool_type="thread",
+        )
+        # Run the module three times
+        runner_results = [
+            runner_future.result()
+            for _ in range(3)
+            for runner_future in runner.run([runner_input])
+        ]
+    for runner_result in runner_results[:2]:
+        assert runner_result.error_msg is None
+    assert "Candidate failed" in runner_results[2].error_msg
+    assert num_sessions == 2
+    assert num_evaluations == 4
+    _clean_build(builder_result.artifact_path)
+
+
+def test_meta_schedule_rpc_runner_unhashable_function():
+    """Test meta schedule rpc runner accepts functions that are not hashable"""
+
+    class UnhashableCleanup:  # pylint: disable=too-few-public-methods
+        def __eq__(self, other):
+            return isinstance(other, UnhashableCleanup)
+
+        def __call__(self, session, remote_path):
+            pass
+
+    with LocalRPC() as rpc:
+        rpc_config = RPCConfig(
+            tracker_host=rpc.tracker_host,
+            tracker_port=rpc.tracker_port,
+            tracker_key=rpc.tracker_key,
+            session_priority=1,
+            session_timeout_sec=100,
+        )
+        for _ in range(2):
+            RPCRunner(rpc_config, f_cleanup=UnhashableCleanup(), pool_type="thread")
+
+
+def test_meta_schedule_rpc_runner_max_workers():
+    """Test meta schedule rpc runner falls back to 1 worker without a tracker"""
+    rpc_config = RPCConfig(
+        tracker_host="127.0.0.1",
+        # An invalid port fails the connection at once, instead of retrying it
+        tracker_port=65536,
+        tracker_key="test_max_workers",
+        session_timeout_sec=1,
+    )
+    runner = RPCRunner(rpc_config, pool_type="thread")
+    assert runner.max_workers == 1
+    # The fallback is not cached, so that a later runner queries the tracker again
+    assert ("127.0.0.1", 65536, "test_max_workers") not in RPCRunner._DETECTED_MAX_WORKERS
+    with pytest.raises(ValueError, match="max_workers"):
+        RPCRunner(rpc_config, max_workers="all", pool_type="thread")
+
+
+def test_meta_schedule_rpc_runner_batch_size():
+    """Test meta schedule rpc runner rejects a batch size below 1"""
+    for batch_size in [0, -1]:
+        with pytest.raises(ValueError, match="batch_size"):
+            RPCRunner(RPCConfig(), max_workers=1, batch_size=batch_size)
+
+
 def test_meta_schedule_py_runner():
     """Test meta schedule PyRunner"""
 
@@ -249,7 +463,8 @@ def test_meta_schedule_py_runner():
         runner.run([])
 
 
-def test_meta_schedule_rpc_runner_time_out():
+@pytest.mark.parametrize("pool_type", ["thread", "process"])
+def test_meta_schedule_rpc_runner_time_out(pool_type: str):
     """Test meta schedule RPC Runner time out"""
 
     def initializer():
@@ -288,17 +503,66 @@ def test_meta_schedule_rpc_runner_time_out():
             evaluator_config,
             initializer=initializer,
             f_create_session="meta_schedule.runner.test_time_out",
+            # A second worker verifies that the initializer is not run twice in a process
+            max_workers=2,
+            pool_type=pool_type,
         )
         # Run the module
         (runner_future,) = runner.run([runner_input])
         runner_result = runner_future.result()
 
+    if pool_type == "process":
+        expected_msg = "RPCRunner: Timeout, killed after"
+    else:
+        expected_msg = "RPCRunner: Timeout, stopped waiting after"
     assert runner_result.error_msg is not None and runner_result.error_msg.startswith(
-        "RPCRunner: Timeout, killed after"
+        expected_msg
     )
     assert runner_result.run_secs is None
 
 
+def test_meta_schedule_rpc_runner_future_batch_time_out():
+    """Test the futures of a batch time out together"""
+    # A future that never completes, like one of a batch stuck on a worker thread
+    future: concurrent.futures.Future = concurrent.futures.Future()
+    deadline = _BatchDeadline(timeout_sec=1)
+    runner_futures = [RPCRunnerFuture(future, 1, index, deadline) for index in range(4)]
+    start = time.time()
+    runner_results = [runner_future.result() for runner_future in runner_futures]
+    assert time.time() - start < 2
+    for runner_result in runner_results:
+        assert runner_result.error_msg is not None and runner_result.error_msg.startswith(
+            "RPCRunner: Timeout, stopped waiting after"
+        )
+        assert runner_result.run_secs is None
+
+
+def test_meta_schedule_rpc_runner_as_completed_results():
+    """Test the results are yielded in the order the futures complete"""
+    slow_future: concurrent.futures.Future = concurrent.futures.Future()
+    fast_future: concurrent.futures.Future = concurrent.futures.Future()
+    # A future that never completes, like one of a batch stuck on a worker thread
+    stuck_future: concurrent.futures.Future = concurrent.futures.Future()
+    runner_futures = [
+        RPCRunnerFuture(slow_future, 100, 0, _BatchDeadline(timeout_sec=100)),
+        RPCRunnerFuture(fast_future, 100, 0, _BatchDeadline(timeout_sec=100)),
+        RPCRunnerFuture(stuck_future, 1, 0, _BatchDeadline(timeout_sec=1)),
+    ]
+    results = RPCRunner.as_completed_results(runner_futures)
+    fast_future.set_result([([1.0], None)])
+    index, runner_result = next(results)
+    assert index == 1 and runner_result.error_msg is None
+    slow_future.set_result([([2.0], None)])
+    index, runner_result = next(results)
+    assert index == 0 and runner_result.error_msg is None
+    # The stuck future times out on its own deadline
+    index, runner_result = next(results)
+    assert index == 2 and runner_result.error_msg.startswith(
+        "RPCRunner: Timeout, stopped waiting after"
+    )
+    assert next(results, None) is None
+
+
 def test_meta_schedule_rpc_runner_exception():
     """Test meta schedule RPC Runner exception"""
 
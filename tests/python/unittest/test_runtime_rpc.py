@@ -210,6 +210,11 @@ def test_rpc_file_exchange():
         remote.upload(blob, "dat.bin")
         rev = remote.download("dat.bin")
         assert rev == blob
+        remote.upload(blob, "dat2.bin")
+        remote.get_function("tvm.rpc.server.remove_files")("dat.bin", "dat2.bin")
+        for path in ["dat.bin", "dat2.bin"]:
+            with pytest.raises(tvm._ffi.base.TVMError):
+                remote.download(path)
 
     check_remote()
 